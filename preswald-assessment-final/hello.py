@@ -1,10 +1,34 @@
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
 import preswald
 
+# Copy-on-write lets atoms share the DataFrame without defensive deep copies.
+# It is always on from pandas 3, where the option is deprecated.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # Create a workflow instance
 workflow = preswald.Workflow()
 
+# preswald reruns every atom on a slider change, so results that only depend on
+# the data are memoized here, keyed on a content hash and bounded in size
+CACHE_SIZE = 4
+
+
+def cached(cache, key, build):
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    cache[key] = value = build()
+    if len(cache) > CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
 
 # Load Data Atom
 @workflow.atom()
@@ -18,12 +42,16 @@ def load_data():
         "carbo", "sugars", "potass", "vitamins", "shelf",
         "weight", "cups", "rating"
     ]
-    for col in numeric_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors="coerce")
     # Drop rows with any missing critical numeric fields
-    df = df.dropna(subset=numeric_cols)
+    values = df[numeric_cols].to_numpy(dtype="float64", na_value=np.nan)
+    df = df[~np.isnan(values).any(axis=1)]
+
+    # Remove non‑positive calories and ratings
+    df = df[(df["calories"] > 0) & (df["rating"] > 0)]
 
-    # Manufacturer full names
+    # Manufacturer full names (categoricals built after filtering so no unused
+    # categories show up in the value counts)
     mfr_map = {
         'A': 'American Home Food Products',
         'G': 'General Mills',
@@ -33,26 +61,81 @@ def load_data():
         'Q': 'Quaker Oats',
         'R': 'Ralston Purina'
     }
-    df["manufacturer_full"] = df["mfr"].map(mfr_map)
+    df["manufacturer_full"] = pd.Categorical(df["mfr"]).rename_categories(mfr_map)
 
     # Type (hot/cold) mapping
     type_map = {
         'C': 'Cold',
         'H': 'Hot'
     }
-    df["type_full"] = df["type"].map(type_map)
+    df["type_full"] = pd.Categorical(df["type"]).rename_categories(type_map)
+
+    # -1 marks a missing value in the numeric fields
+    num = df[numeric_cols]
+    df[numeric_cols] = num.mask(num == -1)
+
+    # Downcast integral columns to the narrowest int dtype; fractional columns
+    # stay float64 so tables render their values exactly
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, downcast="integer")
 
     return df
 
 
-# Analyze Data Atom
+_summary_cache = OrderedDict()
+
+
+# Summarize Data Atom (slider-independent tables, memoized across reruns)
 @workflow.atom(dependencies=["load_data"])
-def analyze_data(load_data):
-    df = load_data.copy()
+def summarize_data(load_data):
+    df = load_data
+    key = pd.util.hash_pandas_object(df).sum()
+    return cached(_summary_cache, key, lambda: build_summary(df))
 
-    # Remove non‑positive calories and ratings
-    df = df[(df["calories"] > 0) & (df["rating"] > 0)]
-    df.replace(-1, pd.NA, inplace=True)
+
+def build_summary(df):
+    dtype_df = (
+        df.dtypes.astype(str)
+        .rename_axis("Column")
+        .reset_index(name="Data Type")
+    )
+
+    # Same layout as describe(); agg still runs one reduction per statistic
+    num = df.select_dtypes(include="number")
+    moments = num.agg(["count", "mean", "std", "min", "max"])
+    quartiles = num.quantile([0.25, 0.5, 0.75])
+    quartiles.index = ["25%", "50%", "75%"]
+    stats = pd.concat([moments, quartiles]).loc[
+        ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    ]
+    stats = stats.transpose().round(2).reset_index()
+
+    categorical_cols = df.select_dtypes(include=["object", "category"]).columns
+    value_counts = {}
+    for col in categorical_cols:
+        value_counts[col] = (
+            df[col].value_counts()
+            .rename_axis(col)
+            .reset_index(name="Count")
+            .head(10)
+        )
+
+    missing = df.isna().sum()
+    missing_df = missing[missing > 0].reset_index()
+    missing_df.columns = ["Column", "Missing Count"]
+
+    return {
+        "dtypes": dtype_df,
+        "stats": stats,
+        "value_counts": value_counts,
+        "missing": missing_df,
+    }
+
+
+# Analyze Data Atom
+@workflow.atom(dependencies=["load_data", "summarize_data"])
+def analyze_data(load_data, summarize_data):
+    df = load_data
+    summary = summarize_data
 
     preswald.sidebar(defaultopen=True, logo='images/cereal_logo.png')
 
@@ -62,35 +145,26 @@ def analyze_data(load_data):
     # Introductory stats
     preswald.text("## Getting Started: Looking at Cereal a Different Way")
 
-    # 1. Total cereals
-    total_df = preswald.query("""
-        SELECT COUNT(*) AS total_cereals
+    # Total cereals, average calories and top 3 highest‑sugar cereals in one scan
+    intro_df = preswald.query("""
+        SELECT COUNT(*) AS total_cereals,
+               ROUND(AVG(CAST(calories AS DOUBLE)), 2) AS avg_calories,
+               LIST(name ORDER BY CAST(sugars AS DOUBLE) DESC, name)[1:3] AS top_sugary
         FROM sample_csv
     """, "sample_csv")
-    if total_df is not None and not total_df.empty:
-        total = total_df["total_cereals"].iloc[0]
+    if intro_df is not None and not intro_df.empty:
+        intro = intro_df.iloc[0]
+
+        # 1. Total cereals
+        total = intro["total_cereals"]
         preswald.alert(f"We chose to look at {total} cereals out there and found a robust dataset to help us out.", level='info')
 
-    # 2. Average calories (cast to DOUBLE)
-    avg_cal_df = preswald.query("""
-        SELECT ROUND(AVG(CAST(calories AS DOUBLE)), 2) AS avg_calories
-        FROM sample_csv
-    """, "sample_csv")
-    if avg_cal_df is not None and not avg_cal_df.empty:
-        avg_cal = avg_cal_df["avg_calories"].iloc[0]
+        # 2. Average calories
+        avg_cal = intro["avg_calories"]
         preswald.alert(f"Thought that cereal is a high calorie treat? Actually the average calories per modest serving are actually more like {avg_cal} calories!")
 
-    # 3. Top 3 highest‑sugar cereals (cast sugars too)
-    sugar_df = preswald.query("""
-        SELECT name,
-               CAST(sugars AS DOUBLE) AS sugars
-        FROM sample_csv
-        ORDER BY sugars DESC
-        LIMIT 3
-    """, "sample_csv")
-    if sugar_df is not None and not sugar_df.empty:
-        top3 = sugar_df["name"].tolist()
-        names_str = ", ".join(top3)
+        # 3. Top 3 highest‑sugar cereals
+        names_str = ", ".join(intro["top_sugary"])
         preswald.alert(f"Cereals can pack a sugary punch though! Here's a little insider info on the 3 most sugary cereals to watch out for: {names_str}", level='warning')
 
     preswald.separator()
@@ -98,42 +172,31 @@ def analyze_data(load_data):
     # 1. Column Types Table
     preswald.text("## Understanding the Data: Column Types")
     if not df.empty:
-        dtype_df = pd.DataFrame({
-            "Column": df.columns,
-            "Data Type": df.dtypes.astype(str)
-        })
-        preswald.table(dtype_df, title="Column Data Types")
+        preswald.table(summary["dtypes"], title="Column Data Types")
     else:
         preswald.text("No data loaded, column types unavailable.")
     preswald.separator()
 
     # 2. First 10 Rows
     preswald.text("## Cereal Analytics & Insights: The Dataset")
-    preswald.table(df, title="Sample Data")
+    preswald.table(df.head(10), title="Sample Data (first 10 rows)")
     preswald.separator()
 
     # 3. Summary Stats (numeric only)
     preswald.text("## Key Metrics Summary (Numerical Only)")
-    stats = df.describe().transpose().round(2).reset_index()
-    preswald.table(stats, title="Numerical Summary")
+    preswald.table(summary["stats"], title="Numerical Summary")
     preswald.separator()
 
     # 4. Categorical Value Counts (Top 10 per column)
     preswald.text("## The Cereal Dichotomy: Hot vs. Cold Value Counts")
-    categorical_cols = df.select_dtypes(include="object").columns
-    for col in categorical_cols:
-        counts = df[col].value_counts().reset_index()
-        counts.columns = [col, "Count"]
-        preswald.table(counts.head(10), title=f"Top 10 '{col}' Values")
+    for col, counts in summary["value_counts"].items():
+        preswald.table(counts, title=f"Top 10 '{col}' Values")
     preswald.separator()
 
     # 5. Missing Values
     preswald.text("## Full Transparency: Missing Value Counts")
-    missing = df.isna().sum()
-    if missing.sum() > 0:
-        missing_df = missing[missing > 0].reset_index()
-        missing_df.columns = ["Column", "Missing Count"]
-        preswald.table(missing_df, title="Missing Values Summary")
+    if not summary["missing"].empty:
+        preswald.table(summary["missing"], title="Missing Values Summary")
     else:
         preswald.text("No missing values detected.")
 
@@ -150,7 +213,9 @@ def analyze_data(load_data):
     )
 
     # Query and filter the DataFrame based on slider
-    filtered = df[df["rating"] >= rating_cutoff][["name", "manufacturer_full", "rating"]]
+    filtered = df.loc[
+        df["rating"] >= rating_cutoff, ["name", "manufacturer_full", "rating"]
+    ].sort_values("rating", ascending=False)
 
     # Display results
     if len(filtered) == 1:
@@ -164,44 +229,96 @@ def analyze_data(load_data):
     return df
 
 
-# Visualize Data Atom
-@workflow.atom(dependencies=["analyze_data"])
-def visualize_data(analyze_data):
-    df = analyze_data.copy()
+# Calories are listed per serving in steps of 10
+CALORIE_BIN_WIDTH = 10
 
-    preswald.text("# The Big Picture: Visualizing the Data")
+# Columns the figures are built from, hashed to key the figure cache
+PLOTTED_COLS = ["calories", "protein", "rating", "manufacturer_full", "type_full"]
 
+_figure_cache = OrderedDict()
+
+
+def cached_figures(df):
+    # Figures are cached as JSON and rebuilt on each call, since preswald.plotly
+    # modifies the figures it is given
+    key = pd.util.hash_pandas_object(df[PLOTTED_COLS]).sum()
+    figs_json = cached(
+        _figure_cache, key, lambda: [fig.to_json() for fig in build_figures(df)]
+    )
+    return [pio.from_json(fig_json) for fig_json in figs_json]
+
+
+def build_figures(df):
     # 1. Calories Distribution
-    fig1 = px.histogram(df, x="calories", title="Distribution of Calories")
-    preswald.plotly(fig1)
-    preswald.separator()
+    # Bin server-side so only the bar heights are sent to the browser, with one
+    # bin centred on each CALORIE_BIN_WIDTH step
+    calories = df["calories"].to_numpy(dtype="float64")
+    if calories.size:
+        half = CALORIE_BIN_WIDTH / 2
+        edges = np.arange(
+            calories.min() - half,
+            calories.max() + half + CALORIE_BIN_WIDTH,
+            CALORIE_BIN_WIDTH
+        )
+        counts, edges = np.histogram(calories, bins=edges)
+        centres = (edges[:-1] + edges[1:]) / 2
+    else:
+        counts, centres = [], []
+    fig1 = px.bar(
+        x=centres,
+        y=counts,
+        labels={"x": "calories", "y": "count"},
+        title="Distribution of Calories"
+    )
+    fig1.update_layout(bargap=0)
 
     # 2. Protein vs. Calories
     fig2 = px.scatter(df, x="protein", y="calories", title="Protein vs. Calories")
-    preswald.plotly(fig2)
-    preswald.separator()
 
     # 3. Ratings by Manufacturer
-    fig3 = px.box(
-        df,
-        x="manufacturer_full",
-        y="rating",
-        title="Rating Distribution by Manufacturer"
+    # Five-number summary per manufacturer, so only the box stats are sent
+    q = (
+        df.groupby("manufacturer_full", observed=True)["rating"]
+        .quantile([0.0, 0.25, 0.5, 0.75, 1.0])
+        .unstack()
+    )
+    fig3 = go.Figure(go.Box(
+        x=q.index.astype(str),
+        lowerfence=q[0.0],
+        q1=q[0.25],
+        median=q[0.5],
+        q3=q[0.75],
+        upperfence=q[1.0]
+    ))
+    fig3.update_layout(
+        title="Rating Distribution by Manufacturer",
+        xaxis_title="manufacturer_full",
+        yaxis_title="rating"
     )
-    preswald.plotly(fig3)
-    preswald.separator()
 
     # 4. Average Calories by Type
     avg_df = (
         df
-        .groupby("type_full")[["calories", "protein", "fat"]]
+        .groupby("type_full", observed=True, sort=False)["calories"]
         .mean()
         .round(2)
         .reset_index()
     )
     fig4 = px.bar(avg_df, x="type_full", y="calories", title="Average Calories by Type")
-    preswald.plotly(fig4)
-    preswald.separator()
+
+    return fig1, fig2, fig3, fig4
+
+
+# Visualize Data Atom
+@workflow.atom(dependencies=["analyze_data"])
+def visualize_data(analyze_data):
+    df = analyze_data
+
+    preswald.text("# The Big Picture: Visualizing the Data")
+
+    for fig in cached_figures(df):
+        preswald.plotly(fig)
+        preswald.separator()
 
     # Key Observations
     preswald.text("## Key Observations: What We Know Based on the Data ")